@@ -26,6 +26,8 @@ ascmhl_supported_hashformats = [
     "xxh64",
     "c4",
 ]
+# xxh128 already runs on the SIMD XXH3 core (it maps to xxhash.xxh3_128), so it combines the
+# fast non-cryptographic default with the wider digest
 ascmhl_default_hashformat = "xxh128"
 ascmhl_reference_hash_format = "c4"  # hash format used to reference other files, e.g. in references and the chain
 # ascmhl_default_ignore_patterns = ['.DS_Store', ascmhl_folder_name]
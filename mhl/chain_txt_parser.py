@@ -11,7 +11,6 @@ from . import logger
 from .__version__ import ascmhl_reference_hash_format
 from .chain import MHLChain, MHLChainGeneration
 from .hashlist import MHLHashList
-from .hasher import create_filehash
 import os
 
 
@@ -24,16 +23,17 @@ def parse(file_path):
     if not os.path.exists(file_path):
         return chain
 
-    lines = [line.rstrip("\n") for line in open(file_path)]
-
-    for line in lines:
-        line = line.rstrip().lstrip()
-        if line != "" and not line.startswith("#"):
-            generation = _generation_from_line_in_chainfile(line)
-            if generation is None:
-                logger.error("cannot read line")
-                continue
-            chain.append_generation(generation)
+    # iterate the file directly instead of materializing all lines up front,
+    # the context manager also makes sure the file handle is closed again
+    with open(file_path) as file:
+        for line in file:
+            line = line.strip()
+            if line != "" and not line.startswith("#"):
+                generation = _generation_from_line_in_chainfile(line)
+                if generation is None:
+                    logger.error("cannot read line")
+                    continue
+                chain.append_generation(generation)
 
     return chain
 
@@ -41,11 +41,11 @@ def parse(file_path):
 def _generation_from_line_in_chainfile(line):
     """creates a Generation object from a line int the chain file"""
 
-    # TODO split by whitespace
-    parts = line.split(None)
+    parts = line.split()
 
-    if parts is not None and parts.__len__() < 4:
-        logger.error('cannot read line "{line}"')
+    # split never returns None so the old None check was dead code
+    if len(parts) < 4:
+        logger.error(f'cannot read line "{line}"')
         return None
 
     generation = MHLChainGeneration(
@@ -55,7 +55,7 @@ def _generation_from_line_in_chainfile(line):
         parts[3],
     )
 
-    if parts.__len__() == 6:
+    if len(parts) == 6:
         generation.signature_identifier = parts[4]
         generation.signature = parts[5]
 
@@ -86,12 +86,13 @@ def _line_for_chainfile(chain_generation: MHLChainGeneration):
 def _append_new_generation_to_file(chain: MHLChain, hash_list: MHLHashList):
     """appends an externally created Generation object to the chain file"""
 
-    # get a new generation for a hashlist
+    # get a new generation for a hashlist, the reference hash was computed while the file
+    # was written so the freshly written generation is not read back from disk here
     generation = MHLChainGeneration(
         hash_list.generation_number,
         hash_list.get_file_name(),
         ascmhl_reference_hash_format,
-        create_filehash(ascmhl_reference_hash_format, hash_list.file_path),
+        hash_list.generate_reference_hash(),
     )
 
     # TODO sanity checks
@@ -101,8 +102,10 @@ def _append_new_generation_to_file(chain: MHLChain, hash_list: MHLHashList):
     # immediately write to file
     logger.debug(f'   appending chain generation for "{generation.ascmhl_filename}" to chain file')
 
+    # build the line up front so the file is opened only for the single append write
+    line = _line_for_chainfile(generation) + "\n"
     with open(chain.file_path, "a") as file:
-        file.write(_line_for_chainfile(generation) + "\n")
+        file.write(line)
 
     # FIXME: check if file could be created
 
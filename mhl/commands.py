@@ -8,8 +8,11 @@ __email__ = "opensource@pomfort.com"
 """
 
 import datetime
+import functools
 import os
 import platform
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 
 import click
 from lxml import etree
@@ -27,7 +30,7 @@ from .__version__ import (
     ascmhl_default_hashformat,
 )
 from .generator import MHLGenerationCreationSession
-from .hasher import create_filehash, DirectoryHashContext
+from .hasher import create_filehash, create_multi_filehash, DirectoryHashContext
 from .hashlist import MHLCreatorInfo, MHLProcessInfo, MHLTool, MHLProcess
 from .history import MHLHistory
 from .traverse import post_order_lexicographic
@@ -80,7 +83,16 @@ from .traverse import post_order_lexicographic
     type=click.Path(exists=True),
     help="A file containing multiple file patterns to ignore.",
 )
-def create(root_path, verbose, hash_format, no_directory_hashes, single_file, ignore_list, ignore_spec_file):
+@click.option(
+    "--skip_unchanged",
+    "-su",
+    default=False,
+    is_flag=True,
+    help="Reuse the recorded hash for files whose size and modification date are unchanged instead of re-hashing them",
+)
+def create(
+    root_path, verbose, hash_format, no_directory_hashes, single_file, ignore_list, ignore_spec_file, skip_unchanged
+):
     """
     Create a new generation for a folder or file(s)
 
@@ -91,16 +103,25 @@ def create(root_path, verbose, hash_format, no_directory_hashes, single_file, ig
     """
     # distinguish different behavior for entire folder vs single files
     if single_file is not None and len(single_file) > 0:
-        create_for_single_files_subcommand(root_path, verbose, hash_format, no_directory_hashes, single_file)
+        create_for_single_files_subcommand(
+            root_path, verbose, hash_format, no_directory_hashes, single_file, skip_unchanged
+        )
         return
     create_for_folder_subcommand(
-        root_path, verbose, hash_format, no_directory_hashes, single_file, ignore_list, ignore_spec_file
+        root_path, verbose, hash_format, no_directory_hashes, single_file, ignore_list, ignore_spec_file, skip_unchanged
     )
     return
 
 
 def create_for_folder_subcommand(
-    root_path, verbose, hash_format, no_directory_hashes, single_file, ignore_list=None, ignore_spec_file=None
+    root_path,
+    verbose,
+    hash_format,
+    no_directory_hashes,
+    single_file,
+    ignore_list=None,
+    ignore_spec_file=None,
+    skip_unchanged=False,
 ):
     # command formerly known as "seal"
     """
@@ -115,8 +136,7 @@ def create_for_folder_subcommand(
     """
     logger.verbose_logging = verbose
 
-    if not os.path.isabs(root_path):
-        root_path = os.path.join(os.getcwd(), root_path)
+    root_path = os.path.abspath(root_path)
 
     logger.verbose(f"Sealing folder at path: {root_path} ...")
 
@@ -136,30 +156,47 @@ def create_for_folder_subcommand(
     # store the directory hashes of sub folders so we can use it when calculating the hash of the parent folder
     dir_hash_mappings = {}
 
-    for folder_path, children in post_order_lexicographic(root_path, session.ignore_spec.get_path_spec()):
-        # generate directory hashes
-        dir_hash_context = None
-        if not no_directory_hashes:
-            dir_hash_context = DirectoryHashContext(hash_format)
-        for item_name, is_dir in children:
-            file_path = os.path.join(folder_path, item_name)
-            not_found_paths.discard(file_path)
-            if is_dir:
-                if not dir_hash_context:
-                    continue
-                hash_string = dir_hash_mappings.pop(file_path)
-            else:
-                hash_string, success = seal_file_path(existing_history, file_path, hash_format, session)
-                if not success:
-                    num_failed_verifications += 1
+    # hashing multiple files in parallel speeds things up considerably since the hashing itself releases the GIL,
+    # the session on the other hand is not thread safe so we only compute the hashes on the worker threads
+    # and append them to the session on the main thread in deterministic traversal order
+    with ThreadPoolExecutor(max_workers=num_hash_workers()) as executor:
+        folder_walk = post_order_lexicographic(root_path, session.ignore_spec.get_path_spec())
+        for folder_path, folder_stat, children in folder_walk:
+            # all children of this folder were found, remove them in one batched set difference
+            not_found_paths.difference_update(os.path.join(folder_path, item_name) for item_name, _, _ in children)
+            # first pass: dispatch the hashing of all contained files to the thread pool
+            hash_futures = {}
+            for item_name, is_dir, item_stat in children:
+                if not is_dir:
+                    file_path = os.path.join(folder_path, item_name)
+                    hash_futures[item_name] = executor.submit(
+                        hash_file_path, existing_history, file_path, hash_format, item_stat, skip_unchanged
+                    )
+            # second pass: generate directory hashes and record the file hashes in the original children order
+            dir_hash_context = None
+            if not no_directory_hashes:
+                dir_hash_context = DirectoryHashContext(hash_format)
+            for item_name, is_dir, item_stat in children:
+                file_path = os.path.join(folder_path, item_name)
+                if is_dir:
+                    if not dir_hash_context:
+                        continue
+                    hash_string = dir_hash_mappings.pop(file_path)
+                else:
+                    hash_string, success = seal_file_path(
+                        existing_history, file_path, hash_format, session, item_stat, hash_futures[item_name].result()
+                    )
+                    if not success:
+                        num_failed_verifications += 1
+                if dir_hash_context:
+                    dir_hash_context.append_hash(hash_string, item_name)
+            dir_hash = None
             if dir_hash_context:
-                dir_hash_context.append_hash(hash_string, item_name)
-        dir_hash = None
-        if dir_hash_context:
-            dir_hash = dir_hash_context.final_hash_str()
-            dir_hash_mappings[folder_path] = dir_hash
-        modification_date = datetime.datetime.fromtimestamp(os.path.getmtime(folder_path))
-        session.append_directory_hash(folder_path, modification_date, hash_format, dir_hash)
+                dir_hash = dir_hash_context.final_hash_str()
+                dir_hash_mappings[folder_path] = dir_hash
+            # the walker already delivered the folder's stat result so no extra getmtime call is needed
+            modification_date = datetime.datetime.fromtimestamp(folder_stat.st_mtime)
+            session.append_directory_hash(folder_path, modification_date, hash_format, dir_hash)
 
     commit_session(session)
 
@@ -171,7 +208,9 @@ def create_for_folder_subcommand(
         raise exception
 
 
-def create_for_single_files_subcommand(root_path, verbose, hash_format, no_directory_hashes, single_file):
+def create_for_single_files_subcommand(
+    root_path, verbose, hash_format, no_directory_hashes, single_file, skip_unchanged=False
+):
     # command formerly known as "record"
     """
     Creates a new generation with the given file(s) or folder(s).
@@ -191,8 +230,7 @@ def create_for_single_files_subcommand(root_path, verbose, hash_format, no_direc
     """
     logger.verbose_logging = verbose
 
-    if not os.path.isabs(root_path):
-        root_path = os.path.join(os.getcwd(), root_path)
+    root_path = os.path.abspath(root_path)
 
     assert len(single_file) != 0
 
@@ -200,23 +238,49 @@ def create_for_single_files_subcommand(root_path, verbose, hash_format, no_direc
     # start a creation session on the existing history
     session = MHLGenerationCreationSession(existing_history)
 
+    single_file = [os.path.abspath(path) for path in single_file]
+
     num_failed_verifications = 0
-    for path in single_file:
-        if not os.path.isabs(path):
-            path = os.path.join(os.getcwd(), path)
-        if os.path.isdir(path):
-            for folder_path, children in post_order_lexicographic(path, session.ignore_spec.get_path_spec()):
-                for item_name, is_dir in children:
-                    file_path = os.path.join(folder_path, item_name)
-                    if is_dir:
-                        continue
-                    _, success = seal_file_path(existing_history, file_path, hash_format, session)
-                    if not success:
-                        num_failed_verifications += 1
-        else:
-            _, success = seal_file_path(existing_history, path, hash_format, session)
-            if not success:
-                num_failed_verifications += 1
+    # as in the folder command we only hash on the worker threads and record the results on the main
+    # thread in input order, dispatching all plain file arguments up front keeps the pool saturated
+    # across the inputs instead of refilling it per argument
+    with ThreadPoolExecutor(max_workers=num_hash_workers()) as executor:
+        file_futures = {}
+        for path in single_file:
+            if not os.path.isdir(path):
+                file_futures[path] = executor.submit(
+                    hash_file_path, existing_history, path, hash_format, os.stat(path), skip_unchanged
+                )
+        for path in single_file:
+            if os.path.isdir(path):
+                for folder_path, _, children in post_order_lexicographic(path, session.ignore_spec.get_path_spec()):
+                    hash_futures = {}
+                    for item_name, is_dir, item_stat in children:
+                        if not is_dir:
+                            file_path = os.path.join(folder_path, item_name)
+                            hash_futures[item_name] = executor.submit(
+                                hash_file_path, existing_history, file_path, hash_format, item_stat, skip_unchanged
+                            )
+                    for item_name, is_dir, item_stat in children:
+                        if is_dir:
+                            continue
+                        file_path = os.path.join(folder_path, item_name)
+                        _, success = seal_file_path(
+                            existing_history,
+                            file_path,
+                            hash_format,
+                            session,
+                            item_stat,
+                            hash_futures[item_name].result(),
+                        )
+                        if not success:
+                            num_failed_verifications += 1
+            else:
+                _, success = seal_file_path(
+                    existing_history, path, hash_format, session, None, file_futures[path].result()
+                )
+                if not success:
+                    num_failed_verifications += 1
 
     commit_session(session)
 
@@ -277,8 +341,7 @@ def verify_entire_folder_against_full_history_subcommand(root_path, verbose, ign
     """
     logger.verbose_logging = verbose
 
-    if not os.path.isabs(root_path):
-        root_path = os.path.join(os.getcwd(), root_path)
+    root_path = os.path.abspath(root_path)
 
     logger.verbose(f"check folder at path: {root_path}")
 
@@ -296,36 +359,88 @@ def verify_entire_folder_against_full_history_subcommand(root_path, verbose, ign
 
     ignore_spec = ignore.MHLIgnoreSpec(existing_history.latest_ignore_patterns(), ignore_list, ignore_spec_file)
 
-    for folder_path, children in post_order_lexicographic(root_path, ignore_spec.get_path_spec()):
-        for item_name, is_dir in children:
-            file_path = os.path.join(folder_path, item_name)
-            not_found_paths.discard(file_path)
-            relative_path = existing_history.get_relative_file_path(file_path)
-            history, history_relative_path = existing_history.find_history_for_path(relative_path)
-            if is_dir:
-                # TODO: find new directories here
-                continue
+    # directory hashes can only be compared against the recorded ones if the traversal sees the same
+    # children as the create command did, so we only do it when no custom ignore patterns are in play
+    verify_directory_hashes = ignore_spec.get_pattern_list() == ignore.default_ignore_list()
+    # store the directory hashes of sub folders so we can use it when calculating the hash of the parent folder
+    dir_hash_mappings = {}
 
-            # check if there is an existing hash in the other generations and verify
-            original_hash_entry = history.find_original_hash_entry_for_path(history_relative_path)
+    with ThreadPoolExecutor(max_workers=num_hash_workers()) as executor:
+        for folder_path, _, children in post_order_lexicographic(root_path, ignore_spec.get_path_spec()):
+            # all children of this folder were found, remove them in one batched set difference
+            not_found_paths.difference_update(os.path.join(folder_path, item_name) for item_name, _, _ in children)
+            # first pass: find the hash entries to verify against and dispatch the hashing to the thread pool
+            hash_futures = {}
+            original_hash_entries = {}
+            num_new_files_in_folder = 0
+            for item_name, is_dir, item_stat in children:
+                file_path = os.path.join(folder_path, item_name)
+                relative_path = existing_history.get_relative_file_path(file_path)
+                history, history_relative_path = existing_history.find_history_for_path(relative_path)
+                if is_dir:
+                    # directories are recorded as media hashes as well so we can report added folders
+                    # that are invisible to the file checks, e.g. added empty folders, the root of a
+                    # (child) history counts as recorded since its media hash is stored as the root hash
+                    if (
+                        history_relative_path != "."
+                        and history.find_latest_media_hash_for_path(history_relative_path) is None
+                    ):
+                        logger.error(f"found new folder {relative_path}")
+                        num_new_files += 1
+                        num_new_files_in_folder += 1
+                    continue
 
-            # in case there is no original hash entry continue
-            if original_hash_entry is None:
-                logger.error(f"found new file {relative_path}")
-                num_new_files += 1
-                continue
+                # check if there is an existing hash in the other generations and verify
+                original_hash_entry = history.find_original_hash_entry_for_path(history_relative_path)
 
-            # create a new hash and compare it against the original hash entry
-            current_hash = create_filehash(original_hash_entry.hash_format, file_path)
-            if original_hash_entry.hash_string == current_hash:
-                logger.verbose(f"verification of file {relative_path}: OK")
-            else:
-                logger.error(
-                    f"ERROR: hash mismatch        for {relative_path} "
-                    f"old {original_hash_entry.hash_format}: {original_hash_entry.hash_string}, "
-                    f"new {original_hash_entry.hash_format}: {current_hash}"
+                # in case there is no original hash entry continue
+                if original_hash_entry is None:
+                    logger.error(f"found new file {relative_path}")
+                    num_new_files += 1
+                    num_new_files_in_folder += 1
+                    continue
+
+                original_hash_entries[item_name] = original_hash_entry
+                hash_futures[item_name] = executor.submit(create_filehash, original_hash_entry.hash_format, file_path)
+
+            # second pass: compare the created hashes against the original hash entries in original children order
+            num_failed_files_in_folder = 0
+            for item_name, is_dir, item_stat in children:
+                if item_name not in hash_futures:
+                    continue
+                file_path = os.path.join(folder_path, item_name)
+                relative_path = existing_history.get_relative_file_path(file_path)
+                original_hash_entry = original_hash_entries[item_name]
+                current_hash = hash_futures[item_name].result()
+                if original_hash_entry.hash_string == current_hash:
+                    logger.verbose("verification of file %s: OK", relative_path)
+                else:
+                    logger.error(
+                        f"ERROR: hash mismatch        for {relative_path} "
+                        f"old {original_hash_entry.hash_format}: {original_hash_entry.hash_string}, "
+                        f"new {original_hash_entry.hash_format}: {current_hash}"
+                    )
+                    num_failed_verifications += 1
+                    num_failed_files_in_folder += 1
+
+            # re-verify the recorded directory hash of this folder from the child hashes we already
+            # created in this pass, without reading any file twice; content changes themselves are
+            # already reported by the per-file, new and missing checks above
+            if verify_directory_hashes:
+                dir_hash, success = verify_directory_hash_from_children(
+                    existing_history,
+                    folder_path,
+                    children,
+                    hash_futures,
+                    original_hash_entries,
+                    dir_hash_mappings,
+                    not_found_paths,
+                    num_new_files_in_folder,
+                    num_failed_files_in_folder,
                 )
-                num_failed_verifications += 1
+                dir_hash_mappings[folder_path] = dir_hash
+                if not success:
+                    num_failed_verifications += 1
 
     exception = test_for_missing_files(not_found_paths, root_path, ignore_spec)
     if num_new_files > 0:
@@ -391,8 +506,7 @@ def diff_entire_folder_against_full_history_subcommand(root_path, verbose, ignor
     """
     logger.verbose_logging = verbose
 
-    if not os.path.isabs(root_path):
-        root_path = os.path.join(os.getcwd(), root_path)
+    root_path = os.path.abspath(root_path)
 
     logger.verbose(f"check folder at path: {root_path}")
 
@@ -409,10 +523,11 @@ def diff_entire_folder_against_full_history_subcommand(root_path, verbose, ignor
 
     ignore_spec = ignore.MHLIgnoreSpec(existing_history.latest_ignore_patterns(), ignore_list, ignore_spec_file)
 
-    for folder_path, children in post_order_lexicographic(root_path, ignore_spec.get_path_spec()):
-        for item_name, is_dir in children:
+    for folder_path, _, children in post_order_lexicographic(root_path, ignore_spec.get_path_spec()):
+        # all children of this folder were found, remove them in one batched set difference
+        not_found_paths.difference_update(os.path.join(folder_path, item_name) for item_name, _, _ in children)
+        for item_name, is_dir, item_stat in children:
             file_path = os.path.join(folder_path, item_name)
-            not_found_paths.discard(file_path)
             relative_path = existing_history.get_relative_file_path(file_path)
             history, history_relative_path = existing_history.find_history_for_path(relative_path)
             if is_dir:
@@ -492,8 +607,7 @@ def info_for_single_file(root_path, verbose, single_file):
 
     logger.verbose_logging = verbose
 
-    if not os.path.isabs(root_path):
-        root_path = os.path.join(os.getcwd(), root_path)
+    root_path = os.path.abspath(root_path)
 
     logger.info(f"Info with history at path: {root_path}")
 
@@ -502,13 +616,17 @@ def info_for_single_file(root_path, verbose, single_file):
     if len(existing_history.hash_lists) == 0:
         raise errors.NoMHLHistoryException(root_path)
 
+    # index all media hashes by path once so each queried file is a single dict lookup
+    # instead of a scan over all generations
+    path_index = defaultdict(list)
+    for hash_list in existing_history.hash_lists:
+        for media_hash in hash_list.media_hashes:
+            path_index[media_hash.path].append((hash_list, media_hash))
+
     for path in single_file:
         relative_path = existing_history.get_relative_file_path(os.path.abspath(path))
         logger.info(f"{relative_path}:")
-        for hash_list in existing_history.hash_lists:
-            media_hash = hash_list.find_media_hash_for_path(relative_path)
-            if media_hash is None:
-                continue
+        for hash_list, media_hash in path_index.get(relative_path, ()):
             for hash_entry in media_hash.hash_entries:
                 if logger.verbose_logging == True:
                     absolutePath = os.path.join(hash_list.get_root_path(), media_hash.path)
@@ -528,31 +646,43 @@ def info_for_single_file(root_path, verbose, single_file):
                     )
 
 
+@functools.lru_cache(maxsize=1)
+def compiled_ascmhl_xsd():
+    """parses and compiles the ASC MHL xsd once per process,
+    this way batch validation of many files pays the schema compilation cost only once"""
+    xsd_path = "xsd/ASCMHL.xsd"
+    return etree.XMLSchema(etree.parse(xsd_path))
+
+
 @click.command()
-@click.argument("file_path", type=click.Path(exists=True))
-def xsd_schema_check(file_path):
+@click.argument("file_paths", type=click.Path(exists=True), nargs=-1, required=True)
+def xsd_schema_check(file_paths):
     """
-    Checks a .mhl file against the xsd schema definition
+    Checks one or more .mhl files against the xsd schema definition
 
     \b
-    The xsd-schema-check command validates a given ASC MHL file against the XML
+    The xsd-schema-check command validates given ASC MHL files against the XML
     XSD. This command can be used to ensure the creation of syntactically valid
     ASC MHL files, for example during implementation of tools creating ASC MHL
     files.
     """
 
-    xsd_path = "xsd/ASCMHL.xsd"
-    xsd = etree.XMLSchema(etree.parse(xsd_path))
+    xsd = compiled_ascmhl_xsd()
 
-    # pass a file handle to support the fake file system used in the tests
-    file = open(file_path, "rb")
-    result = xsd.validate(etree.parse(file))
+    all_valid = True
+    for file_path in file_paths:
+        # pass a file handle to support the fake file system used in the tests
+        file = open(file_path, "rb")
+        result = xsd.validate(etree.parse(file))
 
-    if result:
-        logger.info(f"validated: {file_path}")
-    else:
-        logger.error(f"ERROR: {file_path} didn't validate against XSD!")
-        logger.info(f"Issues:\n{xsd.error_log}")
+        if result:
+            logger.info(f"validated: {file_path}")
+        else:
+            logger.error(f"ERROR: {file_path} didn't validate against XSD!")
+            logger.info(f"Issues:\n{xsd.error_log}")
+            all_valid = False
+
+    if not all_valid:
         raise errors.VerificationFailedException
 
 
@@ -592,37 +722,43 @@ def directory_hash(root_path, verbose, hash_format, ignore_list, ignore_spec_fil
     """
     [TMP] Creates the directory hash of a given folder
     """
-    if not os.path.isabs(root_path):
-        root_path = os.path.join(os.getcwd(), root_path)
+    root_path = os.path.abspath(root_path)
 
     # store the directory hashes of sub folders so we can use it when calculating the hash of the parent folder
     dir_hash_mappings = {}
 
     ignore_spec = ignore.MHLIgnoreSpec(None, ignore_list, ignore_spec_file)
 
-    for folder_path, children in post_order_lexicographic(root_path, ignore_spec.get_path_spec()):
-        dir_hash_context = DirectoryHashContext(hash_format)
-        for item_name, is_dir in children:
-            item_path = os.path.join(folder_path, item_name)
-            if is_dir:
-                if not dir_hash_context:
-                    continue
-                hash_string = dir_hash_mappings.pop(item_path)
-            else:
-                hash_string = create_filehash(hash_format, item_path)
-            dir_hash_context.append_hash(hash_string, item_name)
-        dir_hash = dir_hash_context.final_hash_str()
-        dir_hash_mappings[folder_path] = dir_hash
-        if folder_path == root_path:
-            logger.info(f"  calculated root hash: {hash_format}: {dir_hash}")
-        elif verbose:
-            logger.info(f"directory hash for: {folder_path} {hash_format}: {dir_hash}")
+    with ThreadPoolExecutor(max_workers=num_hash_workers()) as executor:
+        for folder_path, _, children in post_order_lexicographic(root_path, ignore_spec.get_path_spec()):
+            # hash the contained files on the thread pool, then consume the results in original children order
+            hash_futures = {}
+            for item_name, is_dir, item_stat in children:
+                if not is_dir:
+                    item_path = os.path.join(folder_path, item_name)
+                    hash_futures[item_name] = executor.submit(create_filehash, hash_format, item_path)
+            dir_hash_context = DirectoryHashContext(hash_format)
+            for item_name, is_dir, item_stat in children:
+                item_path = os.path.join(folder_path, item_name)
+                if is_dir:
+                    if not dir_hash_context:
+                        continue
+                    hash_string = dir_hash_mappings.pop(item_path)
+                else:
+                    hash_string = hash_futures[item_name].result()
+                dir_hash_context.append_hash(hash_string, item_name)
+            dir_hash = dir_hash_context.final_hash_str()
+            dir_hash_mappings[folder_path] = dir_hash
+            if folder_path == root_path:
+                logger.info(f"  calculated root hash: {hash_format}: {dir_hash}")
+            elif verbose:
+                logger.info(f"directory hash for: {folder_path} {hash_format}: {dir_hash}")
 
 
 def test_for_missing_files(not_found_paths, root_path, ignore_spec: MHLIgnoreSpec = MHLIgnoreSpec()):
     ignore_path_spec = ignore_spec.get_path_spec()
-    # update to exclude our ignored files
-    not_found_paths = [x for x in not_found_paths if not ignore_path_spec.match_file(x)]
+    # update to exclude our ignored files, match_files batches the matching of all paths in one call
+    not_found_paths = sorted(set(not_found_paths) - set(ignore_path_spec.match_files(not_found_paths)))
     if len(not_found_paths) == 0:
         return None
     # test our not_found_paths against our ignore spec to ensure these weren't explicitly ignored.
@@ -642,10 +778,105 @@ def commit_session(session):
     session.commit(creator_info, process_info)
 
 
-def seal_file_path(existing_history, file_path, hash_format, session) -> (str, bool):
+def verify_directory_hash_from_children(
+    existing_history,
+    folder_path,
+    children,
+    hash_futures,
+    original_hash_entries,
+    dir_hash_mappings,
+    not_found_paths,
+    num_new_files_in_folder,
+    num_failed_files_in_folder,
+) -> (str, bool):
+    """accumulates the directory hash of a folder from the already computed child hashes and compares it
+    against the directory hash recorded in the latest generation
+
+    returns a tuple of the computed directory hash (or None if it could not be computed) and whether the
+    comparison succeeded, a folder that can not be compared counts as success since the difference is
+    already reported as new, missing or altered files
+    """
+    # consume the directory hashes of the sub folders also in case we bail out early below
+    child_dir_hashes = {}
+    for item_name, is_dir, _ in children:
+        if is_dir:
+            child_dir_hashes[item_name] = dir_hash_mappings.pop(os.path.join(folder_path, item_name), None)
+
+    relative_path = existing_history.get_relative_file_path(folder_path)
+    history, history_relative_path = existing_history.find_history_for_path(relative_path)
+
+    # compare against the latest generation only since older generations legitimately differ once content was added
+    if len(history.hash_lists) == 0:
+        return None, True
+    folder_media_hash = history.hash_lists[-1].find_media_hash_for_path(history_relative_path)
+    if folder_media_hash is None or len(folder_media_hash.hash_entries) == 0:
+        return None, True
+    folder_hash_entry = folder_media_hash.hash_entries[0]
+
+    # if the folder content doesn't match the records anymore the difference is already reported
+    # as new, missing or altered files, a directory hash comparison would only duplicate the errors,
+    # and skipping it here also keeps the parent folders from reporting the same mismatch again
+    if num_new_files_in_folder > 0 or num_failed_files_in_folder > 0:
+        return None, True
+    folder_prefix = folder_path + os.sep
+    if any(path.startswith(folder_prefix) for path in not_found_paths):
+        return None, True
+
+    dir_hash_context = DirectoryHashContext(folder_hash_entry.hash_format)
+    for item_name, is_dir, _ in children:
+        if is_dir:
+            item_hash = child_dir_hashes[item_name]
+        elif (
+            item_name in original_hash_entries
+            and original_hash_entries[item_name].hash_format == folder_hash_entry.hash_format
+        ):
+            item_hash = hash_futures[item_name].result()
+        else:
+            item_hash = None
+        # without all child hashes in the matching format we can't accumulate a comparable directory hash
+        if item_hash is None:
+            return None, True
+        dir_hash_context.append_hash(item_hash, item_name)
+
+    dir_hash = dir_hash_context.final_hash_str()
+    if dir_hash == folder_hash_entry.hash_string:
+        logger.verbose("verification of folder %s: OK", relative_path)
+        return dir_hash, True
+    logger.error(
+        f"ERROR: hash mismatch        for folder {relative_path} "
+        f"old {folder_hash_entry.hash_format}: {folder_hash_entry.hash_string}, "
+        f"new {folder_hash_entry.hash_format}: {dir_hash}"
+    )
+    return dir_hash, False
+
+
+def num_hash_workers() -> int:
+    """number of threads used for hashing files in parallel
+
+    hashing itself releases the GIL so we can use more workers than cores to keep the storage device busy
+    """
+    return min(32, (os.cpu_count() or 1) * 4)
+
+
+def hash_file_path(existing_history, file_path, hash_format, stat=None, skip_unchanged=False) -> dict:
+    """creates the hashes of a file in all formats needed to seal it, returns a format to hash string mapping
+
+    this only reads from the existing history and doesn't touch the creation session
+    so it is safe to call from multiple threads in parallel
+    """
+    # fast path for sealing a fresh tree: without any recorded generation there can't be hashes
+    # in other formats to verify against so we skip the per-file history lookups entirely
+    if not existing_history.hash_lists and not existing_history.child_histories:
+        return {hash_format: create_filehash(hash_format, file_path)}
+
     relative_path = existing_history.get_relative_file_path(file_path)
-    file_size = os.path.getsize(file_path)
-    file_modification_date = datetime.datetime.fromtimestamp(os.path.getmtime(file_path))
+
+    # when opted in we reuse the recorded hash for files whose size and modification date
+    # are unchanged since the last generation instead of reading and hashing them again
+    if skip_unchanged and stat is not None:
+        reused_hash = _recorded_hash_for_unchanged_file(existing_history, relative_path, stat, hash_format)
+        if reused_hash is not None:
+            return {hash_format: reused_hash}
 
     # find in the according child history the already available hash formats
     existing_child_history, existing_history_relative_path = existing_history.find_history_for_path(relative_path)
@@ -654,16 +885,56 @@ def seal_file_path(existing_history, file_path, hash_format, session) -> (str, b
     # in case there is no hash in the required format to use yet, we need to verify also against
     # one of the existing hash formats, we for simplicity use always the first hash format in this example
     # but one could also use a different one if desired
-    success = True
     if len(existing_hash_formats) > 0 and hash_format not in existing_hash_formats:
-        existing_hash_format = existing_hash_formats[0]
-        hash_in_existing_format = create_filehash(existing_hash_format, file_path)
+        # compute both hashes in one pass over the file instead of reading it twice
+        return create_multi_filehash([existing_hash_formats[0], hash_format], file_path)
+    return {hash_format: create_filehash(hash_format, file_path)}
+
+
+def _recorded_hash_for_unchanged_file(existing_history, relative_path, stat, hash_format):
+    """looks up the recorded hash of a file if its size and modification date still match the latest record
+
+    returns None if the file changed, was never recorded or has no hash in the requested format
+    """
+    existing_child_history, existing_history_relative_path = existing_history.find_history_for_path(relative_path)
+    media_hash = existing_child_history.find_latest_media_hash_for_path(existing_history_relative_path)
+    if media_hash is None or media_hash.is_directory:
+        return None
+    if media_hash.file_size != stat.st_size or media_hash.last_modification_date is None:
+        return None
+    # the recorded modification date is stripped to second precision so compare epoch seconds
+    if int(media_hash.last_modification_date.timestamp()) != int(stat.st_mtime):
+        return None
+    hash_entry = media_hash.find_hash_entry_for_format(hash_format)
+    if hash_entry is None:
+        return None
+    return hash_entry.hash_string
+
+
+def seal_file_path(
+    existing_history, file_path, hash_format, session, stat=None, precomputed_hashes=None
+) -> (str, bool):
+    # callers that traversed the file system already have a stat result at hand, reuse it to avoid extra syscalls
+    if stat is None:
+        stat = os.stat(file_path)
+    file_size = stat.st_size
+    file_modification_date = datetime.datetime.fromtimestamp(stat.st_mtime)
+
+    # the hashes might have been created on a worker thread already, otherwise create them now
+    path_hashes = precomputed_hashes
+    if path_hashes is None:
+        path_hashes = hash_file_path(existing_history, file_path, hash_format)
+
+    success = True
+    for existing_hash_format, hash_in_existing_format in path_hashes.items():
+        if existing_hash_format == hash_format:
+            continue
         # FIXME: test what happens if the existing hash verification fails in other format fails
         # should we then really create two entries
         success &= session.append_file_hash(
             file_path, file_size, file_modification_date, existing_hash_format, hash_in_existing_format
         )
-    current_format_hash = create_filehash(hash_format, file_path)
+    current_format_hash = path_hashes[hash_format]
     # in case the existing hash verification failed we don't want to add the current format hash to the generation
     # but we need to return it for directory hash creation
     if not success:
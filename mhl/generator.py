@@ -54,13 +54,13 @@ class MHLGenerationCreationSession:
         hash_entry = MHLHashEntry(hash_format, hash_string)
         if original_hash_entry is None:
             hash_entry.action = "original"
-            logger.verbose(f"  created original hash for     {relative_path}  {hash_format}: {hash_string}")
+            logger.verbose("  created original hash for     %s  %s: %s", relative_path, hash_format, hash_string)
         else:
             existing_hash_entry = history.find_first_hash_entry_for_path(history_relative_path, hash_format)
             if existing_hash_entry is not None:
                 if existing_hash_entry.hash_string == hash_string:
                     hash_entry.action = "verified"
-                    logger.verbose(f"  verified                      {relative_path}  OK")
+                    logger.verbose("  verified                      %s  OK", relative_path)
                 else:
                     hash_entry.action = "failed"
                     logger.error(
@@ -72,7 +72,7 @@ class MHLGenerationCreationSession:
                 # in case there is no hash entry for this hash format yet
                 hash_entry.action = "new"  # mark as 'new' here, will be changed to verified in _validate_new_hash_list
                 logger.verbose(
-                    f"  created new, verified hash for          {relative_path}  {hash_format}: {hash_string}"
+                    "  created new, verified hash for          %s  %s: %s", relative_path, hash_format, hash_string
                 )
 
         # in case the same file is hashes multiple times we want to add all hash entries
@@ -98,11 +98,11 @@ class MHLGenerationCreationSession:
         if hash_string:
             media_hash.append_hash_entry(MHLHashEntry(hash_format, hash_string))
             if relative_path == ".":
-                logger.verbose(f"  calculated root hash  {hash_format}: {hash_string}")
+                logger.verbose("  calculated root hash  %s: %s", hash_format, hash_string)
             else:
-                logger.verbose(f"  calculated directory hash for {relative_path}  {hash_format}: {hash_string}")
+                logger.verbose("  calculated directory hash for %s  %s: %s", relative_path, hash_format, hash_string)
         else:
-            logger.verbose(f"  added directory entry for     {relative_path}")
+            logger.verbose("  added directory entry for     %s", relative_path)
 
         # in case we just created the root media hash of the current hash list we also add it one history level above
         if new_hash_list.process_info.root_media_hash is media_hash and history.parent_history:
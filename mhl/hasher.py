@@ -8,8 +8,53 @@ __email__ = "opensource@pomfort.com"
 """
 import binascii
 import hashlib
+import mmap
+import os
 import xxhash
 
+# above this size we hand the file to the hash context as one mapped buffer instead of chunked reads,
+# below it the mmap setup cost dominates the savings
+mmap_size_threshold = 10 * 1024 * 1024
+
+
+def read_file_chunks(file_path, chunk_size=4 * 1024 * 1024):
+    """
+    reads a file and yields its content in chunks.
+    single read path for all hashing so alternative read back ends (e.g. batched asynchronous reads)
+    only need to be plugged in here.
+    the chunks are memoryview slices of one reused buffer so no allocation happens per chunk,
+    consumers must use a chunk before advancing the generator.
+    :param file_path: the absolute path to the resource being read
+    :param chunk_size: maximum size of the yielded chunks, defaults to 4MB to amortize the
+                       per read overhead while keeping memory consumption bounded for large files
+    """
+    with open(file_path, "rb") as fd:
+        if os.fstat(fd.fileno()).st_size >= mmap_size_threshold:
+            # large files are mapped and yielded as a single buffer, the hash context consumes
+            # it in one C call and the kernel page cache takes care of the readahead
+            try:
+                with mmap.mmap(fd.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                    if hasattr(mapped, "madvise"):
+                        mapped.madvise(mmap.MADV_SEQUENTIAL)
+                    yield mapped
+                    return
+            except (OSError, ValueError):
+                # some file systems reject mmap, fall back to the chunked read loop
+                pass
+        if hasattr(os, "posix_fadvise"):
+            # let the kernel know we read sequentially so it prefetches aggressively
+            try:
+                os.posix_fadvise(fd.fileno(), 0, 0, os.POSIX_FADV_SEQUENTIAL)
+            except OSError:
+                pass
+        buffer = bytearray(chunk_size)
+        view = memoryview(buffer)
+        while True:
+            num_read = fd.readinto(buffer)
+            if not num_read:
+                break
+            yield view[:num_read]
+
 
 def generate_checksum(csum_type, file_path):
     """
@@ -24,12 +69,8 @@ def generate_checksum(csum_type, file_path):
         print("ERROR: file_path is None")
         return None
 
-    with open(file_path, "rb") as fd:
-        # process files in 1MB chunks so that large files won't cause excessive memory consumption.
-        chunk = fd.read(1024 * 1024)
-        while chunk:
-            csum.update(chunk)
-            chunk = fd.read(1024 * 1024)
+    for chunk in read_file_chunks(file_path):
+        csum.update(chunk)
     return csum.hexdigest()
 
 
@@ -47,66 +88,103 @@ def create_filehash(hash_format, filepath):
     return None
 
 
+def create_multi_filehash(hash_formats, filepath):
+    """creates hash values in multiple formats for a file while reading it only once,
+    returns a mapping of hash format to hex string
+
+    arguments:
+    hash_formats -- list of string values, each one of the supported hash formats, e.g. ['md5', 'xxh64']
+    filepath -- string value, the path to the file
+    """
+    csums = [context_type_for_hash_format(hash_format)() for hash_format in hash_formats]
+    for chunk in read_file_chunks(filepath):
+        for csum in csums:
+            csum.update(chunk)
+    return {hash_format: csum.hexdigest() for hash_format, csum in zip(hash_formats, csums)}
+
+
 def context_type_for_hash_format(hash_format):
-    if hash_format == "md5":
-        return hashlib.md5
-    elif hash_format == "sha1":
-        return hashlib.sha1
-    elif hash_format == "xxh32":
-        return xxhash.xxh32
-    elif hash_format == "xxh64":
-        return xxhash.xxh64
-    elif hash_format == "xxh3":
-        return xxhash.xxh3_64
-    elif hash_format == "xxh128":
-        return xxhash.xxh3_128
-    elif hash_format == "c4":
-        return C4HashContext
-    assert False, "unsupported hash format"
+    context_type = _context_types_by_hash_format.get(hash_format)
+    assert context_type is not None, "unsupported hash format"
+    return context_type
+
+
+# constants of the C4ID base58 encoding, kept at module level so hexdigest doesn't rebuild them per call
+_c4_charset = "123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz"
+_c4_base = 58  # the encoding basis
+_c4_chunk_base = 58 ** 10  # pull ten base58 digits out of the big integer per division
+_c4_id_length = 90  # the guaranteed length
+_c4_zero = "1"  # '0' is not in the C4ID alphabet so '1' is zero
+
+
+# pristine context to copy from, copying skips the Python level constructor and OpenSSL EVP setup
+_sha512_prototype = hashlib.sha512()
 
 
 class C4HashContext:
     def __init__(self):
-        self.internal_context = hashlib.sha512()
+        self.internal_context = _sha512_prototype.copy()
 
     def update(self, input_data):
         self.internal_context.update(input_data)
 
     def hexdigest(self):
-        sha512_string = self.internal_context.hexdigest()
-
-        charset = "123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz"
-        base58 = 58  # the encoding basis
-        c4id_length = 90  # the guaranteed length
-        zero = "1"  # '0' is not in the C4ID alphabet so '1' is zero
-
-        hash_value = int(sha512_string, 16)
-        c4_string = ""
+        # encode in chunks of ten digits so we only need a tenth of the expensive big integer divisions,
+        # the remaining divisions run on small machine sized integers, the big integer is built directly
+        # from the raw digest bytes which skips the hex string round trip
+        hash_value = int.from_bytes(self.internal_context.digest(), "big")
+        digits = []
         while hash_value != 0:
-            modulo = hash_value % base58
-            hash_value = hash_value // base58
-            c4_string = charset[modulo] + c4_string
-
-        c4_string = "c4" + c4_string.rjust(c4id_length - 2, zero)
-        return c4_string
+            hash_value, chunk = divmod(hash_value, _c4_chunk_base)
+            if hash_value != 0:
+                for _ in range(10):
+                    chunk, modulo = divmod(chunk, _c4_base)
+                    digits.append(_c4_charset[modulo])
+            else:
+                # most significant chunk, stop before appending leading zeros
+                while chunk != 0:
+                    chunk, modulo = divmod(chunk, _c4_base)
+                    digits.append(_c4_charset[modulo])
+
+        return "c4" + "".join(reversed(digits)).rjust(_c4_id_length - 2, _c4_zero)
+
+
+# single dict lookup instead of a chain of string comparisons since the dispatch runs once per hash.
+# the cryptographic formats (md5, sha1 and the sha512 used internally by c4) are served by hashlib
+# which binds to OpenSSL, so they use the hardware accelerated implementations (SHA-NI on x86,
+# SHA extensions on ARM) whenever the interpreter is built against OpenSSL 1.1.1 or newer
+_context_types_by_hash_format = {
+    "md5": hashlib.md5,
+    "sha1": hashlib.sha1,
+    "xxh32": xxhash.xxh32,
+    "xxh64": xxhash.xxh64,
+    "xxh3": xxhash.xxh3_64,
+    "xxh128": xxhash.xxh3_128,
+    "c4": C4HashContext,
+}
 
 
 class DirectoryHashContext:
     def __init__(self, hash_format: str):
         self.hash_context = context_type_for_hash_format(hash_format)()
         self.hash_format = hash_format
+        self._buffer = []
 
     def append_hash(self, hash_string: str, item_name: str):
-        # print('append hash:', hash_string, 'item name: ', item_name)
-        # first we add the name of the item (file or directory) to the context
-        self.hash_context.update(item_name.encode("utf-8"))
-        # then we add the binary representation of the hash of the file or directory
+        # instead of updating the hash context once per child we buffer the pieces and feed them
+        # to the context in a single update when the final hash is requested, the resulting digest
+        # is identical since concatenated updates hash the same byte stream
+        # first the name of the item (file or directory) goes into the context
+        self._buffer.append(item_name.encode("utf-8"))
+        # then the binary representation of the hash of the file or directory
         # in case of C4 we can't easily use the binary value so we encode the hash string instead
         if self.hash_format == "c4":
-            hash_binary = hash_string.encode("utf-8")
+            self._buffer.append(hash_string.encode("utf-8"))
         else:
-            hash_binary = binascii.unhexlify(hash_string)
-        self.hash_context.update(hash_binary)
+            self._buffer.append(binascii.unhexlify(hash_string))
 
     def final_hash_str(self):
+        if self._buffer:
+            self.hash_context.update(b"".join(self._buffer))
+            self._buffer = []
         return self.hash_context.hexdigest()
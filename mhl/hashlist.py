@@ -61,6 +61,7 @@ class MHLHashList:
         self.referenced_hash_lists = []
         self.hash_list_references = []
         self.media_hashes_path_map = {}
+        self._reference_hash_cache = None
 
     # methods to query for hashes
     def find_media_hash_for_path(self, relative_path):
@@ -77,10 +78,10 @@ class MHLHashList:
         return media_hash
 
     def set_of_file_paths(self, root_path) -> Set[str]:
-        all_paths = set()
-        for media_hash in self.media_hashes:
-            all_paths.add(os.path.join(root_path, media_hash.path))
-        return all_paths
+        # plain concatenation instead of os.path.join since this runs once per media hash of
+        # every generation and the recorded paths are always relative
+        prefix = root_path + os.sep
+        return {prefix + media_hash.path for media_hash in self.media_hashes}
 
     def get_file_name(self):
         return os.path.basename(self.file_path)
@@ -88,8 +89,16 @@ class MHLHashList:
     def get_root_path(self):
         return os.path.dirname(os.path.dirname(self.file_path))
 
+    def set_reference_hash(self, reference_hash):
+        """stores a reference hash that was computed while the file was written"""
+        self._reference_hash_cache = reference_hash
+
     def generate_reference_hash(self):
-        return create_filehash(ascmhl_reference_hash_format, self.file_path)
+        # an ascmhl file is immutable once written so the file is read and hashed only once
+        # even when several parent generations reference the same child hash list
+        if self._reference_hash_cache is None:
+            self._reference_hash_cache = create_filehash(ascmhl_reference_hash_format, self.file_path)
+        return self._reference_hash_cache
 
     # build
     def append_hash(self, media_hash: MHLMediaHash):
@@ -136,6 +145,10 @@ class MHLMediaHash:
     other member variables:
     """
 
+    # these objects exist once per file and generation, slots keep the per instance
+    # memory bounded when large histories are loaded
+    __slots__ = ("hash_entries", "path", "file_size", "last_modification_date", "is_directory")
+
     hash_entries: List[MHLHashEntry]
     path: Optional[str]
     file_size: Optional[int]
@@ -204,6 +217,10 @@ class MHLHashEntry:
     other member variables:
     """
 
+    # the most numerous objects of a loaded history, slots avoid a per instance __dict__,
+    # media_hash holds the back reference set by MHLMediaHash.append_hash_entry
+    __slots__ = ("hash_string", "hash_format", "action", "media_hash")
+
     hash_string: str
     hash_format: str
     action: Optional[str]
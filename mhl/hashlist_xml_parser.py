@@ -6,6 +6,7 @@ __license__ = "MIT"
 __maintainer__ = "Patrick Renner, Alexander Sahm"
 __email__ = "opensource@pomfort.com"
 """
+import datetime
 import os
 import textwrap
 from timeit import default_timer as timer
@@ -14,7 +15,8 @@ from lxml import etree
 from lxml.builder import E
 
 from . import logger
-from .__version__ import ascmhl_supported_hashformats
+from .__version__ import ascmhl_supported_hashformats, ascmhl_reference_hash_format
+from .hasher import context_type_for_hash_format
 from .hashlist import (
     MHLCreatorInfo,
     MHLHashEntry,
@@ -78,9 +80,12 @@ def parse(file_path):
                     current_object.path = element.text
                     file_size = element.attrib.get("size")
                     current_object.file_size = int(file_size) if file_size else None
-                # TODO: parse date
-                # elif tag == 'lastmodificationdate':
-                # 	current_object.file_size = element.text
+                    modification_date = element.attrib.get("lastmodificationdate")
+                    if modification_date:
+                        try:
+                            current_object.last_modification_date = datetime.datetime.fromisoformat(modification_date)
+                        except ValueError:
+                            pass
                 elif tag in supported_hash_formats:
                     entry = MHLHashEntry(tag, element.text, element.attrib.get("action"))
                     current_object.append_hash_entry(entry)
@@ -149,7 +154,9 @@ def write_hash_list(hash_list: MHLHashList, file_path: str):
     if not os.path.isdir(os.path.dirname(file_path)):
         os.mkdir(os.path.dirname(file_path))
 
-    file = open(file_path, "wb")
+    # every written byte is also fed into a reference hash context, so the chain file entry and
+    # parent history references don't have to read the file back from disk to hash it
+    file = _TeeHashFile(open(file_path, "wb"), context_type_for_hash_format(ascmhl_reference_hash_format)())
     file.write(b'<?xml version="1.0" encoding="UTF-8"?>\n<hashlist version="2.0" xmlns="urn:ASC:MHL:v2.0">\n')
     current_indent = "  "
 
@@ -183,6 +190,25 @@ def write_hash_list(hash_list: MHLHashList, file_path: str):
     current_indent = current_indent[:-2]
     _write_xml_string_to_file(file, "</hashlist>\n", current_indent)
     file.flush()
+    hash_list.set_reference_hash(file.hexdigest())
+
+
+class _TeeHashFile:
+    """small binary file wrapper that updates a hash context with every written byte"""
+
+    def __init__(self, file, hash_context):
+        self._file = file
+        self._hash_context = hash_context
+
+    def write(self, data):
+        self._hash_context.update(data)
+        return self._file.write(data)
+
+    def flush(self):
+        self._file.flush()
+
+    def hexdigest(self):
+        return self._hash_context.hexdigest()
 
 
 def _write_xml_element_to_file(file, xml_element, indent: str):
@@ -10,7 +10,7 @@ __email__ = "opensource@pomfort.com"
 
 from __future__ import annotations
 import os
-import re
+from concurrent.futures import ThreadPoolExecutor
 
 from .__version__ import ascmhl_folder_name, ascmhl_file_extension, ascmhl_chainfile_name
 from . import hashlist_xml_parser, chain_txt_parser
@@ -46,8 +46,6 @@ class MHLHistory:
     root_path -- path where the mhl folder resides
     """
 
-    history_file_name_regex = r"^(\d{4,})(?:_(.+))?$"
-
     chain: Optional[MHLChain]
     hash_lists: List[MHLHashList]
     asc_mhl_path: Optional[str]
@@ -62,28 +60,38 @@ class MHLHistory:
         self.child_history_mappings = {}
         self.parent_history = None
         self.asc_mhl_path = None
+        self._history_for_path_cache = {}
+        self._file_paths_cache = None
+        self._root_path_cache = None
 
     def append_hash_list(self, hash_list):
         self.hash_lists.append(hash_list)
+        self._invalidate_file_paths_cache()
+
+    def _invalidate_file_paths_cache(self):
+        # the file path sets of the parent histories contain our paths as well so invalidate them too
+        history = self
+        while history is not None:
+            history._file_paths_cache = None
+            history = history.parent_history
 
     def get_root_path(self):
         if not self.asc_mhl_path:
             return None
-        return os.path.dirname(self.asc_mhl_path)
+        # called once per path lookup and per hash list so cache the derived string
+        if self._root_path_cache is None:
+            self._root_path_cache = os.path.dirname(self.asc_mhl_path)
+        return self._root_path_cache
 
     def get_relative_file_path(self, file_path):
         if not self.asc_mhl_path:
             return None
         if os.path.isabs(file_path):
-            return os.path.relpath(file_path, os.path.dirname(self.asc_mhl_path))
+            return os.path.relpath(file_path, self.get_root_path())
         return None
 
     def latest_generation_number(self) -> int:
-        latest_number = 0
-        for hash_list in self.hash_lists:
-            if hash_list.generation_number:
-                latest_number = hash_list.generation_number
-        return latest_number
+        return max((hash_list.generation_number or 0 for hash_list in self.hash_lists), default=0)
 
     def latest_ignore_patterns(self) -> Optional[List[str]]:
         """
@@ -131,6 +139,18 @@ class MHLHistory:
                     return hash_entry
         return None
 
+    def find_latest_media_hash_for_path(self, relative_path: str):
+        """Searches the history for the most recently recorded media hash of a file
+
+        starts with the latest generation and returns the first match so the returned
+        media hash reflects the last recorded state of the file.
+        """
+        for hash_list in reversed(self.hash_lists):
+            media_hash = hash_list.find_media_hash_for_path(relative_path)
+            if media_hash is not None:
+                return media_hash
+        return None
+
     def find_existing_hash_formats_for_path(self, relative_path: str) -> List[str]:
         """Searches through the history to find all existing hash formats we might want to compare against"""
         hash_formats = []
@@ -147,24 +167,36 @@ class MHLHistory:
     def find_history_for_path(self, relative_path: str) -> Tuple[MHLHistory, str]:
         if len(self.child_histories) == 0:
             return self, relative_path
+        # the same paths are resolved repeatedly (e.g. once for hashing and once for appending to a session)
+        # so we memoize the result per path, the cache is invalidated when the child mappings change
+        cached_result = self._history_for_path_cache.get(relative_path)
+        if cached_result is not None:
+            return cached_result
         dir_path = relative_path
         # shorten the path until we find a mapping otherwise there is no child history that should handle the path
+        result = (self, relative_path)
         while len(dir_path) > 0:
             if dir_path in self.child_history_mappings:
                 history = self.child_history_mappings[dir_path]
                 absolute_path = os.path.join(self.get_root_path(), relative_path)
                 history_relative_path = history.get_relative_file_path(absolute_path)
-                return history, history_relative_path
+                result = (history, history_relative_path)
+                break
             dir_path = os.path.dirname(dir_path)
-        return self, relative_path
+        self._history_for_path_cache[relative_path] = result
+        return result
 
     def set_of_file_paths(self) -> Set[str]:
-        all_paths = set()
-        for hash_list in self.hash_lists:
-            all_paths.update(hash_list.set_of_file_paths(self.get_root_path()))
-        for child_history in self.child_histories:
-            all_paths.update(child_history.set_of_file_paths())
-        return all_paths
+        # cache the collected paths as a frozenset since building it iterates all media hashes of
+        # all generations, callers get a mutable copy so they can remove found paths from it
+        if self._file_paths_cache is None:
+            all_paths = set()
+            for hash_list in self.hash_lists:
+                all_paths.update(hash_list.set_of_file_paths(self.get_root_path()))
+            for child_history in self.child_histories:
+                all_paths.update(child_history.set_of_file_paths())
+            self._file_paths_cache = frozenset(all_paths)
+        return set(self._file_paths_cache)
 
     def hash_list_with_file_name(self, file_name) -> Optional[MHLHashList]:
         for hash_list in self.hash_lists:
@@ -174,6 +206,7 @@ class MHLHistory:
 
     def append_child_history(self, child_history: MHLHistory) -> None:
         self.child_histories.append(child_history)
+        self._invalidate_file_paths_cache()
 
     # loading history and child histories from path
 
@@ -189,21 +222,27 @@ class MHLHistory:
         history.chain = chain_txt_parser.parse(file_path)
 
         hash_lists = []
-        for root, directories, filenames in os.walk(asc_mhl_folder_path):
-            for filename in filenames:
-                if filename.endswith(ascmhl_file_extension):
-                    # file name example: 0001_root_2020-01-15_130000.mhl
-                    filename_no_extension, _ = os.path.splitext(filename)
-                    parts = re.findall(MHLHistory.history_file_name_regex, filename_no_extension)
-                    if len(parts) == 1 and len(parts[0]) == 2:
-                        file_path = os.path.join(asc_mhl_folder_path, filename)
-                        hash_list = hashlist_xml_parser.parse(file_path)
-
-                        generation_number = int(parts[0][0])
-                        hash_list.generation_number = generation_number
-                        hash_lists.append(hash_list)
-                    else:
-                        logger.error(f"name of ascmhl file {filename} does not conform to naming convention")
+        # the ascmhl folder is flat so a single scandir pass replaces the recursive os.walk,
+        # the folder might not exist yet (e.g. on the first create) which os.walk silently ignored
+        try:
+            dir_entries = sorted(os.scandir(asc_mhl_folder_path), key=lambda entry: entry.name)
+        except FileNotFoundError:
+            dir_entries = []
+        for dir_entry in dir_entries:
+            filename = dir_entry.name
+            if filename.endswith(ascmhl_file_extension):
+                # file name example: 0001_root_2020-01-15_130000.mhl
+                filename_no_extension, _ = os.path.splitext(filename)
+                # the generation number is the leading part before the first underscore, plain
+                # string ops parse it without dispatching into the regex engine per file
+                generation_string = filename_no_extension.split("_", 1)[0]
+                if len(generation_string) >= 4 and generation_string.isdigit():
+                    hash_list = hashlist_xml_parser.parse(dir_entry.path)
+
+                    hash_list.generation_number = int(generation_string)
+                    hash_lists.append(hash_list)
+                else:
+                    logger.error(f"name of ascmhl file {filename} does not conform to naming convention")
         # sort all found hash lists by generation number first to make sure we add them to the history in order
         hash_lists.sort(key=lambda x: x.generation_number)
         for hash_list in hash_lists:
@@ -231,6 +270,7 @@ class MHLHistory:
 
     def _update_child_history_mapping(self) -> None:
         self.child_history_mappings = {}
+        self._history_for_path_cache = {}
         for child_history in self.child_histories:
             relative_child_path = self.get_relative_file_path(child_history.get_root_path())
             self.child_history_mappings[relative_child_path] = child_history
@@ -249,14 +289,25 @@ class MHLHistory:
 
     def _resolve_hash_list_references(self) -> None:
         """for all hash lists resolve existing hash list references by searching them in the child histories"""
+        references = []
         for hash_list in self.hash_lists:
             for reference in hash_list.hash_list_references:
                 reference_path = os.path.dirname(os.path.dirname(reference.path))
                 history = self.child_history_mappings[reference_path]
                 referenced_hash_list = history.hash_list_with_file_name(os.path.basename(reference.path))
                 assert referenced_hash_list is not None
-                assert referenced_hash_list.generate_reference_hash() == reference.reference_hash
-                hash_list.referenced_hash_lists.append(referenced_hash_list)
+                references.append((hash_list, reference, referenced_hash_list))
+        if not references:
+            return
+        # re-hashing the referenced ascmhl files dominates this step and each file is independent,
+        # so the reference hashes are computed in a small thread pool before they are checked
+        with ThreadPoolExecutor(max_workers=min(len(references), 8)) as executor:
+            reference_hashes = list(
+                executor.map(lambda referenced: referenced.generate_reference_hash(), (r[2] for r in references))
+            )
+        for (hash_list, reference, referenced_hash_list), reference_hash in zip(references, reference_hashes):
+            assert reference_hash == reference.reference_hash
+            hash_list.referenced_hash_lists.append(referenced_hash_list)
 
     # writing new generations
 
@@ -22,6 +22,7 @@ class MHLIgnoreSpec:
 
     def __init__(self, existing_pattern_list=None, new_pattern_list=None, new_pattern_file=None):
         self._ignore_list = []
+        self._path_spec = None
         self.set_patterns(existing_pattern_list, new_pattern_list, new_pattern_file)
 
     def set_patterns(self, existing_pattern_list=None, new_pattern_list=None, new_pattern_file=None):
@@ -33,6 +34,7 @@ class MHLIgnoreSpec:
         no duplicates will be added.
         """
         self._ignore_list = []
+        self._path_spec = None
         if existing_pattern_list:
             self._append_patterns_list(existing_pattern_list)
         else:
@@ -46,8 +48,11 @@ class MHLIgnoreSpec:
         """
         get_path_spec will return a pathspec.PathSpec instance filled with the contents of self.ignore_list
         the returned pathspec.PathSpec instance can be used to match against filepaths.
+        the compiled spec is cached so repeated calls don't recompile the patterns.
         """
-        return pathspec.PathSpec.from_lines("gitwildmatch", iter(self._ignore_list))
+        if self._path_spec is None:
+            self._path_spec = pathspec.PathSpec.from_lines("gitwildmatch", iter(self._ignore_list))
+        return self._path_spec
 
     def get_pattern_list(self):
         return self._ignore_list.copy()
@@ -7,7 +7,7 @@ __maintainer__ = "Jon Waggoner"
 __email__ = "opensource@jonwaggoner.com"
 """
 
-from os.path import join, isdir
+from os.path import join
 import os
 
 from . import logger
@@ -15,36 +15,41 @@ import pathspec
 from .__version__ import ascmhl_folder_name
 
 
-def post_order_lexicographic(top: str, ignore_pathspec: pathspec.PathSpec = None):
+def post_order_lexicographic(top: str, ignore_pathspec: pathspec.PathSpec = None, top_stat: os.stat_result = None):
     """
     iterates a file system in the order necessary to generate composite tree hashes, bypassing ignored paths.
 
     :param top: the directory being iterated
     :param ignore_pathspec: the pathspec of ignore patterns to match file exclusions against
+    :param top_stat: the stat result of the top directory if the caller already has it,
+                     used internally to hand down the stats collected while scanning the parent
     :return: yields results in folder chunks, in the order necessary for composite directory hashes
     """
-    # create a sorted list of our immediate children
-    names = os.listdir(top)
-    names.sort()
+    # create a sorted list of our immediate children, scandir gives us the stat information of each child
+    # without additional syscalls so callers don't have to stat the files again
+    with os.scandir(top) as entries:
+        sorted_entries = sorted(entries, key=lambda entry: entry.name)
 
-    # list of tuples. each tuple contains the child name and whether the child is a directory.
+    # list of tuples. each tuple contains the child name, whether the child is a directory and its stat result.
     children = []
-    for name in names:
-        file_path = os.path.join(top, name)
+    for entry in sorted_entries:
+        file_path = entry.path
         if ignore_pathspec and ignore_pathspec.match_file(file_path):
             if os.path.basename(os.path.normpath(file_path)) != ascmhl_folder_name:
-                logger.verbose(f"ignoring filepath {file_path}")
+                logger.verbose("ignoring filepath %s", file_path)
             continue
-        path = join(top, name)
-        children.append((name, isdir(path)))
+        children.append((entry.name, entry.is_dir(), entry.stat()))
 
     # if directory, yield children recursively in post order until exhausted.
-    for name, is_dir in children:
+    for name, is_dir, stat in children:
         if is_dir:
             path = join(top, name)
             if not os.path.islink(path):
-                for x in post_order_lexicographic(path, ignore_pathspec):
+                for x in post_order_lexicographic(path, ignore_pathspec, stat):
                     yield x
 
-    # now that all children have been traversed, yield the top (current) directory and all of it's sorted children.
-    yield top, children
+    # now that all children have been traversed, yield the top (current) directory with its own stat result
+    # and all of it's sorted children. only the root of the walk needs an extra stat call here.
+    if top_stat is None:
+        top_stat = os.stat(top)
+    yield top, top_stat, children
@@ -18,6 +18,21 @@ def matches_prefixes(text: str, prefixes: list):
     return False
 
 
+# cache the timezone objects since they are immutable and constructing the timedelta and
+# timezone per formatted date adds up when writing generations with many files
+_local_timezones_by_dst = {}
+
+
+def _local_timezone():
+    is_dst = time.localtime().tm_isdst
+    timezone = _local_timezones_by_dst.get(is_dst)
+    if timezone is None:
+        utc_offset_sec = time.altzone if is_dst else time.timezone
+        timezone = datetime.timezone(offset=datetime.timedelta(seconds=-utc_offset_sec))
+        _local_timezones_by_dst[is_dst] = timezone
+    return timezone
+
+
 def datetime_isostring(date, keep_microseconds=False):
     """create an iso string representation for a date object
     e.g. for use in XML tags and attributes
@@ -26,15 +41,12 @@ def datetime_isostring(date, keep_microseconds=False):
     date -- date object
     keep_microseconds -- include microseconds in iso
     """
-    utc_offset_sec = time.altzone if time.localtime().tm_isdst else time.timezone
-    utc_offset = datetime.timedelta(seconds=-utc_offset_sec)
-
     if keep_microseconds:
         date_to_format = date
     else:
         date_to_format = date.replace(microsecond=0)
 
-    return date_to_format.replace(tzinfo=datetime.timezone(offset=utc_offset)).isoformat()
+    return date_to_format.replace(tzinfo=_local_timezone()).isoformat()
 
 
 def datetime_now_isostring():
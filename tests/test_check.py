@@ -39,6 +39,19 @@ def test_check_fail_altered_file(fs, simple_mhl_history):
     assert "Stuff.txt" in result.output
 
 
+def test_check_fail_altered_file_reports_folders_once(fs, simple_mhl_history):
+    # alter a file inside a sub folder
+    with open("/root/A/A1.txt", "a") as file:
+        file.write("!!")
+
+    runner = CliRunner()
+    result = runner.invoke(mhl.commands.verify, ["/root"])
+    assert result.exit_code == 12
+    assert "A1.txt" in result.output
+    # the mismatch is only reported for the file itself, not repeated for every enclosing folder
+    assert result.output.count("ERROR: hash mismatch") == 1
+
+
 def test_check_fail_new_file(fs, simple_mhl_history):
     # create a file not referenced in the history
     fs.create_file("/root/other.txt", contents="other\n")
@@ -48,6 +61,16 @@ def test_check_fail_new_file(fs, simple_mhl_history):
     assert "other.txt" in result.output
 
 
+def test_check_fail_new_empty_folder(fs, simple_mhl_history):
+    # create a folder not referenced in the history
+    fs.create_dir("/root/A/NewEmpty")
+
+    runner = CliRunner()
+    result = runner.invoke(mhl.commands.verify, ["/root"])
+    assert result.exit_code == 13
+    assert "A/NewEmpty" in result.output
+
+
 def test_check_fail_missing_file(fs, simple_mhl_history):
     # remove a referenced file
     os.remove("/root/Stuff.txt")
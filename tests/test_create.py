@@ -181,6 +181,23 @@ def test_create_fail_altered_file(fs, simple_mhl_history):
     assert "Stuff.txt" in result.output
 
 
+def test_create_skip_unchanged(fs, simple_mhl_history):
+    # alter a file but keep its size and modification date unchanged
+    stat = os.stat("/root/Stuff.txt")
+    with open("/root/Stuff.txt", "w") as file:
+        file.write("tuffs\n")
+    os.utime("/root/Stuff.txt", (stat.st_atime, stat.st_mtime))
+
+    # with --skip_unchanged the file is not read again, the recorded hash is reused and sealing succeeds
+    result = CliRunner().invoke(mhl.commands.create, ["/root", "-h", "xxh64", "-su"])
+    assert result.exit_code == 0
+
+    # a regular create reads the file again and detects the alteration
+    result = CliRunner().invoke(mhl.commands.create, ["/root", "-h", "xxh64"])
+    assert result.exit_code == 12
+    assert "Stuff.txt" in result.output
+
+
 def test_create_fail_missing_file(fs, nested_mhl_histories):
     """
     test that sealing fails if there is a file missing on the file system that is referenced by one of the histories
@@ -8,12 +8,11 @@ __email__ = "opensource@pomfort.com"
 """
 
 import os
-import re
+import shutil
 from freezegun import freeze_time
 from click.testing import CliRunner
 
 from mhl import hashlist_xml_parser
-from mhl.__version__ import ascmhl_file_extension
 from mhl.history import MHLHistory
 import mhl.commands
 
@@ -195,24 +194,24 @@ def test_child_history_partial_verification_bb_folder(fs, nested_mhl_histories):
     assert aa_history.latest_generation_number() == 1
 
 
-def test_hash_list_name_parsing():
-    def _test_regex(filename, should_match):
-        filename_no_extension, _ = os.path.splitext(filename)
-        if filename.endswith(ascmhl_file_extension):
-            parts = re.findall(MHLHistory.history_file_name_regex, filename_no_extension)
-            if should_match:
-                assert len(parts) == 1 and len(parts[0]) == 2
-            else:
-                assert len(parts) == 0
-        else:
-            assert not should_match
-
-    _test_regex("0001_AA_2020-01-16_091500.mhl", True)
-    _test_regex("10001_AA_2020-01-16_091500.mhl", True)
-    _test_regex("0002.mhl", True)
-    _test_regex("0004_myCustomString_123.mhl", True)
-
-    _test_regex("001_AA_2020-01-16_091500.mhl", False)
-    _test_regex("0001_AA_2020-01-16_091500.xml", False)
-    _test_regex("AA_2020-01-16_091500_0002.mhl", False)
-    _test_regex("0003_.mhl", False)
+def test_hash_list_name_parsing(fs, simple_mhl_history):
+    # copy the existing generation file to various file names and check which of them
+    # load_from_path picks up as generations and which generation numbers it assigns
+    existing_file_path = "/root/ascmhl/0001_root_2020-01-15_130000.mhl"
+    accepted_file_names = [
+        "0002.mhl",
+        "0003_.mhl",
+        "0004_myCustomString_123.mhl",
+        "10001_AA_2020-01-16_091500.mhl",
+    ]
+    rejected_file_names = [
+        "001_AA_2020-01-16_091500.mhl",
+        "0005_AA_2020-01-16_091500.xml",
+        "AA_2020-01-16_091500_0006.mhl",
+    ]
+    for file_name in accepted_file_names + rejected_file_names:
+        shutil.copyfile(existing_file_path, os.path.join("/root/ascmhl", file_name))
+
+    history = MHLHistory.load_from_path("/root")
+    generation_numbers = sorted(hash_list.generation_number for hash_list in history.hash_lists)
+    assert generation_numbers == [1, 2, 3, 4, 10001]